@@ -0,0 +1,81 @@
+# app/core/cancellation.py
+"""Cooperative cancellation tokens with deadlines for in-flight generations."""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCancelled(Exception):
+    """Raised inside a generation loop when its token is cancelled or expired."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason  # "deadline" or the reason passed to cancel()
+
+
+class CancellationToken:
+    """
+    Shared between ChatService and GeminiClient for one request.
+
+    The service cancels it when the session moves on (new message,
+    "Start fresh"). The client registers callbacks with on_cancel() that
+    abort the in-flight SDK call, so a cancel takes effect immediately
+    rather than at the next streamed chunk.
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+        self.deadline = (
+            time.monotonic() + timeout_seconds if timeout_seconds else None
+        )
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Request cancellation and run registered callbacks once."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Cancellation callback failed: %s", exc)
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Run `callback` on cancel; immediately if already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None if there is none."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def raise_if_cancelled(self) -> None:
+        """Raise GenerationCancelled if cancelled or past the deadline."""
+        if self._event.is_set():
+            raise GenerationCancelled(self.reason or "cancelled")
+        if self.expired:
+            raise GenerationCancelled("deadline")
@@ -3,7 +3,7 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 
 import yaml
@@ -22,6 +22,22 @@ class PromptSettings:
     output_format: str
 
 
+@dataclass
+class ModelTier:
+    """One routing tier: which model to call and how much it may generate."""
+    name: str
+    model_name: str
+    max_output_tokens: Optional[int]  # None = use the sidebar / default limit
+    top_k: int
+
+
+@dataclass
+class RoutingSettings:
+    enabled: bool
+    default_tier: str
+    tiers: Dict[str, ModelTier]
+
+
 @dataclass
 class ModelSettings:
     model_name: str
@@ -29,6 +45,8 @@ class ModelSettings:
     max_output_tokens: int
     top_p: float
     top_k: int
+    request_timeout_seconds: float = 60.0
+    routing: Optional[RoutingSettings] = None
 
 
 @dataclass
@@ -40,11 +58,22 @@ class AppSettings:
     environment: str  # "local" | "staging" | "production"
 
 
+@dataclass
+class UsageSettings:
+    store_path: Path
+    flush_interval_seconds: float
+    session_token_budget: int  # 0 = unlimited
+    daily_token_budget: int  # 0 = unlimited
+    degrade_at_fraction: float
+    degraded_max_output_tokens: int
+
+
 @dataclass
 class Settings:
     prompts: PromptSettings
     model: ModelSettings
     app: AppSettings
+    usage: UsageSettings
     gemini_api_key: Optional[str] = None
 
 
@@ -54,6 +83,29 @@ def load_yaml_config(path: Path) -> dict:
         return yaml.safe_load(f)
 
 
+def load_routing_settings(model_cfg: dict) -> Optional[RoutingSettings]:
+    """Build routing settings from the optional `model.routing` block."""
+    routing_cfg = model_cfg.get("routing")
+    if not routing_cfg:
+        return None
+
+    tiers = {
+        name: ModelTier(
+            name=name,
+            model_name=tier_cfg.get("model_name", model_cfg["model_name"]),
+            max_output_tokens=tier_cfg.get("max_output_tokens"),
+            top_k=tier_cfg.get("top_k", model_cfg["top_k"]),
+        )
+        for name, tier_cfg in routing_cfg.get("tiers", {}).items()
+    }
+
+    return RoutingSettings(
+        enabled=routing_cfg.get("enabled", True),
+        default_tier=routing_cfg.get("default_tier", "full"),
+        tiers=tiers,
+    )
+
+
 def load_settings() -> Settings:
     """Load full application settings from YAML + environment."""
     cfg = load_yaml_config(CONFIG_PATH)
@@ -61,6 +113,7 @@ def load_settings() -> Settings:
     prompts_cfg = cfg["prompts"]
     model_cfg = cfg["model"]
     app_cfg = cfg["app"]
+    usage_cfg = cfg.get("usage", {})
 
     settings = Settings(
         prompts=PromptSettings(
@@ -76,6 +129,8 @@ def load_settings() -> Settings:
             max_output_tokens=model_cfg["max_output_tokens"],
             top_p=model_cfg["top_p"],
             top_k=model_cfg["top_k"],
+            request_timeout_seconds=model_cfg.get("request_timeout_seconds", 60.0),
+            routing=load_routing_settings(model_cfg),
         ),
         app=AppSettings(
             app_name=app_cfg["app_name"],
@@ -84,6 +139,16 @@ def load_settings() -> Settings:
             enable_telemetry=app_cfg.get("enable_telemetry", False),
             environment=app_cfg.get("environment", "local"),
         ),
+        usage=UsageSettings(
+            store_path=BASE_DIR / usage_cfg.get("store_path", "data/usage.sqlite3"),
+            flush_interval_seconds=usage_cfg.get("flush_interval_seconds", 30),
+            session_token_budget=usage_cfg.get("session_token_budget", 0),
+            daily_token_budget=usage_cfg.get("daily_token_budget", 0),
+            degrade_at_fraction=usage_cfg.get("degrade_at_fraction", 0.8),
+            degraded_max_output_tokens=usage_cfg.get(
+                "degraded_max_output_tokens", 256
+            ),
+        ),
         gemini_api_key=os.getenv("GEMINI_API_KEY"),
     )
 
@@ -10,6 +10,9 @@ class ChatMessage:
     """Single chat turn."""
     role: str   # 'user' | 'assistant'
     content: str
+    # False for turns shown in the chat but never sent back to Gemini
+    # (e.g. budget refusals and the message that triggered them).
+    in_context: bool = True
 
 
 @dataclass
@@ -20,17 +23,36 @@ class SessionMemory:
     """
     messages: List[ChatMessage] = field(default_factory=list)
     max_history: int = 15
-
-    def add_message(self, role: str, content: str) -> None:
-        """Add a new message and trim if over the limit."""
-        self.messages.append(ChatMessage(role=role, content=content))
+    # Bumped on clear() so in-flight replies for an old conversation
+    # can tell they are stale and skip writing.
+    generation: int = 0
+
+    def add_message(
+        self,
+        role: str,
+        content: str,
+        in_context: bool = True,
+    ) -> ChatMessage:
+        """Add a new message, trim if over the limit, and return it."""
+        message = ChatMessage(role=role, content=content, in_context=in_context)
+        self.messages.append(message)
         if len(self.messages) > self.max_history:
             self.messages = self.messages[-self.max_history:]
+        return message
+
+    def remove_message(self, message: ChatMessage) -> None:
+        """Remove one specific message (matched by identity), if still present."""
+        self.messages = [m for m in self.messages if m is not message]
 
     def to_dicts(self) -> List[Dict[str, Any]]:
-        """Convert messages to list of plain dicts for prompt building."""
-        return [{"role": m.role, "content": m.content} for m in self.messages]
+        """Convert in-context messages to plain dicts for prompt building."""
+        return [
+            {"role": m.role, "content": m.content}
+            for m in self.messages
+            if m.in_context
+        ]
 
     def clear(self) -> None:
         """Reset conversation history."""
         self.messages.clear()
+        self.generation += 1
@@ -1,18 +1,100 @@
 # app/core/models.py
 """Gemini API client wrapper with structured request handling and fallback."""
 
+import asyncio
 import logging
-from typing import List, Optional
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
 
 from google import genai
 from google.genai import types
 
+from .cancellation import CancellationToken, GenerationCancelled
 from .config import Settings
+from .usage import UsageRecord
 
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ChatCompletion:
+    """Text reply plus the token usage reported by Gemini."""
+    text: str
+    model_name: str
+    usage: UsageRecord = field(default_factory=UsageRecord)
+    cancelled: bool = False  # True if the caller's token fired mid-generation
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop for async SDK calls, starting it
+    on a daemon thread on first use.
+
+    One long-lived loop keeps the async client's pooled connections bound
+    to a loop that never closes, and avoids a thread + loop per request.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="gemini-aio", daemon=True
+            ).start()
+            _loop = loop
+    return _loop
+
+
+class _StreamCall:
+    """
+    One async SDK stream submitted to the background loop; chunks are
+    handed back to the calling thread through a queue.
+
+    abort() cancels the task, which interrupts a pending or streaming
+    HTTP read, so abandoned calls stop holding an upstream slot instead
+    of running until their next chunk.
+    """
+
+    def __init__(self, client, model: str, contents: List[str], config) -> None:
+        self.queue: "queue.Queue" = queue.Queue()
+        self._future = asyncio.run_coroutine_threadsafe(
+            self._consume(client, model, contents, config),
+            _background_loop(),
+        )
+
+    def abort(self) -> None:
+        """Cancel the SDK call (no-op once finished) and wake the consumer."""
+        self._future.cancel()
+        self.queue.put(("aborted", None))
+
+    async def _consume(self, client, model, contents, config) -> None:
+        stream = None
+        try:
+            stream = await client.aio.models.generate_content_stream(
+                model=model,
+                contents=contents,
+                config=config,
+            )
+            async for chunk in stream:
+                self.queue.put(("chunk", chunk))
+            self.queue.put(("done", None))
+        except Exception as exc:  # noqa: BLE001
+            self.queue.put(("error", exc))
+        finally:
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                try:
+                    await aclose()
+                except Exception:  # noqa: BLE001
+                    pass
+
+
 class GeminiClient:
     """
     Thin, testable wrapper around the Google Gen AI Python SDK.
@@ -30,14 +112,35 @@ class GeminiClient:
         messages: List[dict],
         temperature: Optional[float] = None,
         max_output_tokens: Optional[int] = None,
-    ) -> str:
+        model_name: Optional[str] = None,
+        top_k: Optional[int] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        on_chunk: Optional[Callable[[str], None]] = None,
+        on_usage: Optional[Callable[[UsageRecord], None]] = None,
+    ) -> ChatCompletion:
         """
-        Call Gemini and return the text response.
+        Stream a Gemini reply and return the text with its token usage.
+
+        `model_name` and `top_k` let the caller route a request to a
+        different tier; they default to the configured base model.
+
+        The SDK call runs on a shared background event loop. `cancel_token` carries the
+        request deadline (also applied as the HTTP timeout); cancelling it
+        or passing the deadline aborts the call at once, whether it is
+        still waiting for the first chunk or mid-stream. `on_chunk` is
+        called on the caller's thread with the reply text so far. `on_usage`
+        is called exactly once with the usage seen, even if the stream is
+        abandoned because `on_chunk` raised.
 
         Falls back to a safe error message on any exception so the UI
         is never broken by an API failure.
         """
         cfg = self.settings.model
+        http_options = None
+        if cancel_token is not None and cancel_token.remaining() is not None:
+            http_options = types.HttpOptions(
+                timeout=max(int(cancel_token.remaining() * 1000), 1)
+            )
         generation_config = types.GenerateContentConfig(
             temperature=temperature if temperature is not None else cfg.temperature,
             max_output_tokens=(
@@ -46,27 +149,112 @@ class GeminiClient:
                 else cfg.max_output_tokens
             ),
             top_p=cfg.top_p,
-            top_k=cfg.top_k,
+            top_k=top_k if top_k is not None else cfg.top_k,
+            http_options=http_options,
         )
 
+        model_name = model_name or self.model_name
+        usage = UsageRecord()
+        parts: List[str] = []
+        call = None
+
         try:
-            response = self.client.models.generate_content(
-                model=self.model_name,
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            call = _StreamCall(
+                client=self.client,
+                model=model_name,
                 contents=[m["content"] for m in messages],
                 config=generation_config,
             )
-            text = getattr(response, "text", "").strip()
+            if cancel_token is not None:
+                cancel_token.on_cancel(call.abort)
+            usage = UsageRecord(requests=1)
+
+            while True:
+                timeout = cancel_token.remaining() if cancel_token else None
+                try:
+                    kind, payload = call.queue.get(timeout=timeout)
+                except queue.Empty:
+                    raise GenerationCancelled("deadline")
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                if kind == "done":
+                    break
+                if kind == "error":
+                    raise payload
+                if kind != "chunk":
+                    continue
+                # Usage metadata is cumulative; the last chunk has the totals.
+                if getattr(payload, "usage_metadata", None) is not None:
+                    usage = UsageRecord.from_response(payload)
+                parts.append(getattr(payload, "text", None) or "")
+                if on_chunk is not None:
+                    on_chunk("".join(parts))
+
+            text = "".join(parts).strip()
             if not text:
                 logger.warning("Empty response received from Gemini.")
-                return (
-                    "I could not generate a response right now. "
-                    "Please try again in a moment."
+                return ChatCompletion(
+                    text=(
+                        "I could not generate a response right now. "
+                        "Please try again in a moment."
+                    ),
+                    model_name=model_name,
+                    usage=usage,
                 )
-            return text
+            return ChatCompletion(text=text, model_name=model_name, usage=usage)
+
+        except GenerationCancelled as exc:
+            if exc.reason == "deadline":
+                logger.warning("Gemini call exceeded its deadline.")
+                return self._timeout_completion(model_name, usage, parts)
+            logger.info("Gemini call cancelled: %s", exc.reason)
+            return ChatCompletion(
+                text="".join(parts),
+                model_name=model_name,
+                usage=usage,
+                cancelled=True,
+            )
 
         except Exception as exc:  # noqa: BLE001
+            if cancel_token is not None and cancel_token.expired:
+                logger.warning("Gemini call timed out: %s", exc)
+                return self._timeout_completion(model_name, usage, parts)
             logger.exception("Gemini API call failed: %s", exc)
-            return (
-                "I ran into an issue while generating your answer. "
-                "Please try rephrasing your question or try again."
+            return ChatCompletion(
+                text=(
+                    "I ran into an issue while generating your answer. "
+                    "Please try rephrasing your question or try again."
+                ),
+                model_name=model_name,
+                usage=usage,
+            )
+
+        finally:
+            # No-op once the stream has finished; otherwise closes the
+            # upstream connection.
+            if call is not None:
+                call.abort()
+            if on_usage is not None:
+                on_usage(usage)
+
+    @staticmethod
+    def _timeout_completion(
+        model_name: str,
+        usage: UsageRecord,
+        parts: List[str],
+    ) -> ChatCompletion:
+        partial = "".join(parts).strip()
+        if partial:
+            # Keep what the user already watched stream in.
+            text = (
+                f"{partial}\n\n"
+                "_(Reply cut short: it took longer than expected.)_"
+            )
+        else:
+            text = (
+                "That took longer than expected, so I stopped waiting. "
+                "Please try again, or ask a shorter question."
             )
+        return ChatCompletion(text=text, model_name=model_name, usage=usage)
@@ -0,0 +1,317 @@
+# app/core/usage.py
+"""Usage accounting: real token counts from Gemini, aggregated and budgeted."""
+
+import atexit
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional
+
+from .config import UsageSettings
+
+
+logger = logging.getLogger(__name__)
+
+# Below this many output tokens a reply is not worth sending.
+MIN_OUTPUT_TOKENS = 64
+
+
+@dataclass
+class UsageRecord:
+    """Token counts for one or more Gemini calls (from usage_metadata)."""
+    prompt_tokens: int = 0
+    candidate_tokens: int = 0
+    thoughts_tokens: int = 0
+    cached_tokens: int = 0  # subset of prompt_tokens served from cache
+    requests: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.candidate_tokens + self.thoughts_tokens
+
+    def add(self, other: "UsageRecord") -> None:
+        """Accumulate another record into this one."""
+        self.prompt_tokens += other.prompt_tokens
+        self.candidate_tokens += other.candidate_tokens
+        self.thoughts_tokens += other.thoughts_tokens
+        self.cached_tokens += other.cached_tokens
+        self.requests += other.requests
+
+    def minus(self, other: "UsageRecord") -> "UsageRecord":
+        """Return the difference between this record and an earlier snapshot."""
+        return UsageRecord(
+            prompt_tokens=self.prompt_tokens - other.prompt_tokens,
+            candidate_tokens=self.candidate_tokens - other.candidate_tokens,
+            thoughts_tokens=self.thoughts_tokens - other.thoughts_tokens,
+            cached_tokens=self.cached_tokens - other.cached_tokens,
+            requests=self.requests - other.requests,
+        )
+
+    @classmethod
+    def from_response(cls, response) -> "UsageRecord":
+        """Build a record from a google-genai response's usage_metadata."""
+        meta = getattr(response, "usage_metadata", None)
+        if meta is None:
+            return cls(requests=1)
+        return cls(
+            prompt_tokens=getattr(meta, "prompt_token_count", None) or 0,
+            candidate_tokens=getattr(meta, "candidates_token_count", None) or 0,
+            thoughts_tokens=getattr(meta, "thoughts_token_count", None) or 0,
+            cached_tokens=getattr(meta, "cached_content_token_count", None) or 0,
+            requests=1,
+        )
+
+
+@dataclass
+class BudgetDecision:
+    """Result of a pre-request budget check."""
+    allowed: bool
+    max_output_tokens: int
+    reason: str = "ok"  # ok | degraded | session_budget | daily_budget
+
+
+class UsageStore:
+    """Daily usage totals persisted in a local SQLite file."""
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS daily_usage ("
+                " day TEXT PRIMARY KEY,"
+                " prompt_tokens INTEGER NOT NULL DEFAULT 0,"
+                " candidate_tokens INTEGER NOT NULL DEFAULT 0,"
+                " thoughts_tokens INTEGER NOT NULL DEFAULT 0,"
+                " cached_tokens INTEGER NOT NULL DEFAULT 0,"
+                " requests INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=5)
+
+    def add(self, day: str, delta: UsageRecord) -> None:
+        """Add a usage delta to the totals for `day`."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO daily_usage (day, prompt_tokens, candidate_tokens,"
+                " thoughts_tokens, cached_tokens, requests)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(day) DO UPDATE SET"
+                " prompt_tokens = prompt_tokens + excluded.prompt_tokens,"
+                " candidate_tokens = candidate_tokens + excluded.candidate_tokens,"
+                " thoughts_tokens = thoughts_tokens + excluded.thoughts_tokens,"
+                " cached_tokens = cached_tokens + excluded.cached_tokens,"
+                " requests = requests + excluded.requests",
+                (
+                    day,
+                    delta.prompt_tokens,
+                    delta.candidate_tokens,
+                    delta.thoughts_tokens,
+                    delta.cached_tokens,
+                    delta.requests,
+                ),
+            )
+
+    def get_day(self, day: str) -> UsageRecord:
+        """Return the stored totals for `day` (zeros if none)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT prompt_tokens, candidate_tokens, thoughts_tokens,"
+                " cached_tokens, requests FROM daily_usage WHERE day = ?",
+                (day,),
+            ).fetchone()
+        return UsageRecord(*row) if row else UsageRecord()
+
+
+class _ThreadCounters:
+    """Counters written only by their owning thread, so no lock is needed."""
+
+    __slots__ = ("owner", "usage")
+
+    def __init__(self) -> None:
+        self.owner = threading.current_thread()
+        self.usage = UsageRecord()
+
+
+class UsageLedger:
+    """
+    Process-wide usage ledger.
+
+    Each thread accumulates into its own counters without locking. A
+    daemon flusher thread periodically sums all counters, writes the delta
+    since the last flush to the UsageStore, and folds in counters of
+    finished threads; request threads never touch the store on record().
+    """
+
+    def __init__(self, settings: UsageSettings) -> None:
+        self.settings = settings
+        self.store = UsageStore(settings.store_path)
+        self._local = threading.local()
+        self._counters: List[_ThreadCounters] = []
+        self._registry_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._retired = UsageRecord()
+        self._flushed = UsageRecord()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._day = date.today().isoformat()
+        self._day_stored = self.store.get_day(self._day)
+
+    def _thread_counters(self) -> _ThreadCounters:
+        counters = getattr(self._local, "counters", None)
+        if counters is None:
+            counters = _ThreadCounters()
+            with self._registry_lock:
+                self._counters.append(counters)
+            self._local.counters = counters
+        return counters
+
+    def _snapshot(self) -> UsageRecord:
+        # The registry lock only guards the counter list; writers never take
+        # it when recording, so this does not block the request path.
+        total = UsageRecord()
+        with self._registry_lock:
+            total.add(self._retired)
+            for counters in self._counters:
+                total.add(counters.usage)
+        return total
+
+    def record(self, usage: UsageRecord) -> None:
+        """Record one call's usage in the calling thread's counters."""
+        self._thread_counters().usage.add(usage)
+
+    def start(self) -> None:
+        """Start the background flusher thread (idempotent)."""
+        if self._flusher is not None:
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="usage-ledger-flush", daemon=True
+        )
+        self._flusher.start()
+
+    def stop(self) -> None:
+        """Stop the flusher thread and persist anything still pending."""
+        self._stop.set()
+        self.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.settings.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Usage flusher error: %s", exc)
+
+    def flush(self) -> None:
+        """Persist usage recorded since the last flush."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        try:
+            with self._registry_lock:
+                live = []
+                for counters in self._counters:
+                    if counters.owner.is_alive():
+                        live.append(counters)
+                    else:
+                        self._retired.add(counters.usage)
+                self._counters = live
+
+            current = self._snapshot()
+            delta = current.minus(self._flushed)
+            # Counters are read without locking, so a snapshot can catch an
+            # add() half-way (tokens counted, requests not yet). Write any
+            # non-zero field; the remainder lands in the next flush.
+            if any(
+                (
+                    delta.prompt_tokens,
+                    delta.candidate_tokens,
+                    delta.thoughts_tokens,
+                    delta.cached_tokens,
+                    delta.requests,
+                )
+            ):
+                # Book the delta to the day it accumulated in; across
+                # midnight that is at most one flush interval off.
+                self.store.add(self._day, delta)
+            self._flushed = current
+            today = date.today().isoformat()
+            self._day = today
+            self._day_stored = self.store.get_day(today)
+            logger.debug(
+                "Usage flushed: day=%s delta_tokens=%s day_total=%s",
+                today,
+                delta.total_tokens,
+                self._day_stored.total_tokens,
+            )
+        except sqlite3.Error as exc:
+            logger.exception("Failed to flush usage ledger: %s", exc)
+
+    def daily_total(self) -> int:
+        """Tokens used today: persisted totals plus unflushed usage."""
+        if date.today().isoformat() != self._day:
+            self.flush()
+        # Hold the flush lock so _flushed and _day_stored are read as a
+        # consistent pair rather than half-way through a flush.
+        with self._flush_lock:
+            unflushed = self._snapshot().minus(self._flushed)
+            return self._day_stored.total_tokens + unflushed.total_tokens
+
+    def check_budget(
+        self,
+        session_tokens: int,
+        est_prompt_tokens: int,
+        max_output_tokens: int,
+    ) -> BudgetDecision:
+        """
+        Decide whether a request may be sent and with what output limit.
+
+        Args:
+            session_tokens: Tokens already used by the calling session.
+            est_prompt_tokens: Estimated prompt size of the new request.
+            max_output_tokens: Output limit the request would use.
+
+        Returns:
+            BudgetDecision; when degraded, max_output_tokens is lowered.
+        """
+        cfg = self.settings
+
+        session_budget = cfg.session_token_budget
+        if session_budget and session_tokens + est_prompt_tokens >= session_budget:
+            return BudgetDecision(False, 0, "session_budget")
+
+        daily_budget = cfg.daily_token_budget
+        if not daily_budget:
+            return BudgetDecision(True, max_output_tokens)
+
+        used = self.daily_total()
+        remaining = daily_budget - used - est_prompt_tokens
+        if remaining < MIN_OUTPUT_TOKENS:
+            return BudgetDecision(False, 0, "daily_budget")
+
+        limit = max_output_tokens
+        if used >= daily_budget * cfg.degrade_at_fraction:
+            limit = min(limit, cfg.degraded_max_output_tokens)
+        limit = min(limit, remaining)
+        if limit < max_output_tokens:
+            return BudgetDecision(True, limit, "degraded")
+        return BudgetDecision(True, limit)
+
+
+_ledger: Optional[UsageLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_usage_ledger(settings: UsageSettings) -> UsageLedger:
+    """Return the process-wide ledger, creating it on first use."""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = UsageLedger(settings)
+                _ledger.start()
+                atexit.register(_ledger.stop)
+    return _ledger
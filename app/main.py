@@ -17,6 +17,7 @@ from app.ui.layout import (
     render_sidebar,
     render_chat_history,
     render_typing_indicator,
+    render_streaming_reply,
     chat_input,
 )
 
@@ -25,8 +26,6 @@ def init_session_state() -> None:
     """Initialize Streamlit session state on first run."""
     if "memory" not in st.session_state:
         st.session_state["memory"] = SessionMemory()
-    if "chat_tokens" not in st.session_state:
-        st.session_state["chat_tokens"] = 0
     if "settings" not in st.session_state:
         st.session_state["settings"] = load_settings()
     if "chat_service" not in st.session_state:
@@ -50,7 +49,11 @@ def main() -> None:
         app_name=settings.app.app_name,
         domain_name=settings.app.domain_name,
     )
-    overrides = render_sidebar(settings=settings)
+    overrides = render_sidebar(
+        settings=settings,
+        session_tokens=chat_service.session_usage.total_tokens,
+        daily_tokens=chat_service.usage_ledger.daily_total(),
+    )
 
     # --- Chat history ---
     render_chat_history(memory=memory)
@@ -60,15 +63,25 @@ def main() -> None:
 
     if user_prompt:
         with st.spinner(""):
-            render_typing_indicator()
-            reply, est_tokens = chat_service.handle_user_message(
+            reply_slot = st.empty()
+            with reply_slot.container():
+                render_typing_indicator()
+            # A new message or "Start fresh" cancels this session's
+            # in-flight call and drops the turn. Any other rerun (e.g. a
+            # slider change) aborts the run from inside on_chunk; the
+            # partial reply is kept, marked as stopped. A closed tab is
+            # only bounded by the request deadline.
+            reply, tokens_used, cancelled = chat_service.handle_user_message(
                 user_message=user_prompt,
                 memory=memory,
                 temperature=overrides.get("temperature"),
                 max_output_tokens=overrides.get("max_output_tokens"),
+                on_chunk=lambda text: render_streaming_reply(reply_slot, text),
             )
-            st.session_state["chat_tokens"] += est_tokens
-            logger.info("Message processed. tokens=%s", est_tokens)
+            if cancelled:
+                # Superseded by a newer run; leave the UI to that run.
+                return
+            logger.info("Message processed. tokens=%s", tokens_used)
             st.rerun()
 
 
@@ -2,12 +2,16 @@
 """Chat orchestration: ties together prompt building, memory, and Gemini API."""
 
 import logging
-from typing import Tuple
+import threading
+from typing import Callable, Optional, Tuple
 
+from app.core.cancellation import CancellationToken
 from app.core.config import Settings
-from app.core.memory import SessionMemory
+from app.core.memory import ChatMessage, SessionMemory
 from app.core.prompts import PromptBuilder
 from app.core.models import GeminiClient
+from app.core.usage import UsageLedger, UsageRecord, get_usage_ledger
+from .router import QueryRouter
 from .utils import approximate_token_count, sanitize_user_input
 
 
@@ -19,15 +23,81 @@ class ChatService:
     Orchestrates the full pipeline for a single user message:
     1. Sanitize input
     2. Build prompt with history
-    3. Call Gemini API
-    4. Store assistant reply in memory
-    5. Return reply + token estimate
+    3. Route to a model tier by query complexity
+    4. Check session / daily token budgets
+    5. Call Gemini API under a deadline and record actual usage
+    6. Store assistant reply in memory unless cancelled or stale
+    7. Return reply, tokens used and whether the turn was cancelled
     """
 
-    def __init__(self, settings: Settings) -> None:
+    BUDGET_MESSAGES = {
+        "session_budget": (
+            "This browser session has used up its token allowance. "
+            "\"Start fresh\" does not reset it; reload the page to begin "
+            "a new session."
+        ),
+        "daily_budget": (
+            "Career Compass has reached its daily usage limit. "
+            "Please try again tomorrow."
+        ),
+    }
+
+    def __init__(
+        self,
+        settings: Settings,
+        usage_ledger: Optional[UsageLedger] = None,
+    ) -> None:
         self.settings = settings
         self.prompt_builder = PromptBuilder(settings=settings)
         self.client = GeminiClient(settings=settings)
+        self.router = QueryRouter(routing=settings.model.routing)
+        self.usage_ledger = usage_ledger or get_usage_ledger(settings.usage)
+        # One ChatService lives per Streamlit session, so this is the
+        # session's running total; "Start fresh" does not reset it.
+        self.session_usage = UsageRecord()
+        # With runner.fastReruns an abandoned script thread can still be in
+        # handle_user_message while a new run starts, so _inflight and
+        # session_usage are shared between threads and guarded by _lock.
+        self._lock = threading.Lock()
+        self._inflight: Optional[CancellationToken] = None
+
+    def cancel_inflight(self, reason: str = "cancelled") -> None:
+        """Cancel the session's in-flight generation, if any."""
+        with self._lock:
+            token, self._inflight = self._inflight, None
+        if token is not None:
+            token.cancel(reason)
+
+    def _record_usage(self, usage: UsageRecord) -> None:
+        self.usage_ledger.record(usage)
+        with self._lock:
+            self.session_usage.add(usage)
+
+    def _abandon_turn(
+        self,
+        memory: SessionMemory,
+        user_turn: ChatMessage,
+        memory_generation: int,
+        partial: str,
+    ) -> None:
+        """
+        Clean up a turn that will not get a normal reply, so history never
+        holds an unanswered question (two user turns in a row).
+
+        A partial reply the user already saw is kept, marked as stopped;
+        otherwise the pending user message is removed. Nothing is touched
+        if the conversation was cleared in the meantime.
+        """
+        with self._lock:
+            if memory.generation != memory_generation:
+                return
+            if partial.strip():
+                memory.add_message(
+                    "assistant", f"{partial.strip()}\n\n_(Stopped.)_"
+                )
+            else:
+                memory.remove_message(user_turn)
+        logger.info("Abandoned turn. kept_partial=%s", bool(partial.strip()))
 
     def handle_user_message(
         self,
@@ -35,7 +105,8 @@ class ChatService:
         memory: SessionMemory,
         temperature: float = None,
         max_output_tokens: int = None,
-    ) -> Tuple[str, int]:
+        on_chunk: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[str, int, bool]:
         """
         Process one user turn and return the assistant reply.
 
@@ -44,12 +115,19 @@ class ChatService:
             memory: Current session memory object.
             temperature: Optional temperature override.
             max_output_tokens: Optional token limit override.
+            on_chunk: Optional callback receiving the partial reply text.
 
         Returns:
-            Tuple of (assistant_reply_str, estimated_total_tokens).
+            Tuple of (assistant_reply_str, total_tokens_used, cancelled).
+            When cancelled is True the turn was abandoned (superseded,
+            "Start fresh") and nothing was written to memory.
         """
+        # A new message supersedes whatever this session was still generating.
+        self.cancel_inflight("superseded")
+
         clean_message = sanitize_user_input(user_message)
-        memory.add_message("user", clean_message)
+        user_turn = memory.add_message("user", clean_message)
+        memory_generation = memory.generation
         history_dicts = memory.to_dicts()
 
         messages = self.prompt_builder.build_messages(
@@ -60,16 +138,112 @@ class ChatService:
         est_tokens_in = approximate_token_count([m["content"] for m in messages])
         logger.debug("Estimated input tokens: %s", est_tokens_in)
 
-        assistant_reply = self.client.generate_chat_completion(
-            messages=messages,
-            temperature=temperature,
+        model_name = None
+        top_k = None
+        decision = self.router.route(
+            clean_message,
+            last_reply=next(
+                (
+                    h["content"]
+                    for h in reversed(history_dicts)
+                    if h["role"] == "assistant"
+                ),
+                None,
+            ),
+        )
+        if decision is not None:
+            tier = decision.tier
+            model_name = tier.model_name
+            top_k = tier.top_k
+            # The tier limit caps the sidebar value; it never raises it.
+            if tier.max_output_tokens is not None:
+                max_output_tokens = (
+                    min(tier.max_output_tokens, max_output_tokens)
+                    if max_output_tokens is not None
+                    else tier.max_output_tokens
+                )
+        if max_output_tokens is None:
+            max_output_tokens = self.settings.model.max_output_tokens
+
+        budget = self.usage_ledger.check_budget(
+            session_tokens=self.session_usage.total_tokens,
+            est_prompt_tokens=est_tokens_in,
             max_output_tokens=max_output_tokens,
         )
+        if not budget.allowed:
+            logger.warning("Request refused: %s exceeded.", budget.reason)
+            refusal = self.BUDGET_MESSAGES[budget.reason]
+            # Shown in the chat, but kept out of the prompt for later turns.
+            user_turn.in_context = False
+            memory.add_message("assistant", refusal, in_context=False)
+            return refusal, 0, False
+        if budget.reason == "degraded":
+            logger.info(
+                "Daily budget nearly spent; max_output_tokens %s -> %s",
+                max_output_tokens,
+                budget.max_output_tokens,
+            )
+        max_output_tokens = budget.max_output_tokens
+
+        token = CancellationToken(
+            timeout_seconds=self.settings.model.request_timeout_seconds
+        )
+        with self._lock:
+            self._inflight = token
+
+        # Last partial reply the UI rendered successfully.
+        shown = [""]
+
+        def _on_chunk(text: str) -> None:
+            if on_chunk is not None:
+                on_chunk(text)
+            shown[0] = text
+
+        try:
+            completion = self.client.generate_chat_completion(
+                messages=messages,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                model_name=model_name,
+                top_k=top_k,
+                cancel_token=token,
+                on_chunk=_on_chunk,
+                on_usage=self._record_usage,
+            )
+        except BaseException:
+            # Streamlit interrupts the run from inside on_chunk on any
+            # rerun (e.g. a sidebar slider change), not only a new message.
+            # Keep what was streamed so far, marked as stopped.
+            token.cancel("interrupted")
+            self._abandon_turn(memory, user_turn, memory_generation, shown[0])
+            raise
+        finally:
+            with self._lock:
+                if self._inflight is token:
+                    self._inflight = None
+
+        usage = completion.usage
+        assistant_reply = completion.text
+        # Checked under the lock so a concurrent cancel_inflight() either
+        # lands first (turn discarded) or after the write (then cleared).
+        with self._lock:
+            stale = completion.cancelled or token.cancelled
+            if not stale and memory.generation == memory_generation:
+                memory.add_message("assistant", assistant_reply)
+        if stale or memory.generation != memory_generation:
+            # Superseded by a new message or "Start fresh": drop the turn.
+            self._abandon_turn(memory, user_turn, memory_generation, "")
+            return "", usage.total_tokens, True
+
+        logger.info(
+            "Message handled. model=%s prompt=%s candidates=%s thoughts=%s "
+            "cached=%s total=%s",
+            completion.model_name,
+            usage.prompt_tokens,
+            usage.candidate_tokens,
+            usage.thoughts_tokens,
+            usage.cached_tokens,
+            usage.total_tokens,
+        )
 
-        memory.add_message("assistant", assistant_reply)
-
-        est_tokens_out = approximate_token_count([assistant_reply])
-        est_total = est_tokens_in + est_tokens_out
-        logger.info("Message handled. Estimated total tokens: %s", est_total)
-
-        return assistant_reply, est_total
+        return assistant_reply, usage.total_tokens, False
@@ -0,0 +1,137 @@
+# app/services/router.py
+"""Query routing: picks a model tier from a fast, rule-based complexity check."""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.core.config import ModelTier, RoutingSettings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Whole-message acknowledgements: greetings, thanks, bare yes/no/ok.
+# Anything after them ("yes please", "ok expand on 3") is a real request.
+ACK_PATTERN = re.compile(
+    r"^(?:(?:hi|hello|hey|thanks|thank you(?: so much| very much)?|thx|ty|"
+    r"ok|okay|cool|great|nice|got it|sounds good|perfect|awesome|bye|"
+    r"goodbye|yes|yep|no|nope|sure)[\s.!,]*)+$",
+    re.IGNORECASE,
+)
+
+# An assistant turn ending like this expects a substantive answer, so even
+# a bare "yes" in reply should get the full tier.
+OFFER_PATTERN = re.compile(
+    r"\?|\b(would you like|do you want|want me to|shall i|should i|"
+    r"let me know|i can (also )?(help|create|build|draft|write|share|"
+    r"put together|prepare))\b",
+    re.IGNORECASE,
+)
+
+# How much of the previous reply's tail to scan for an offer or question.
+OFFER_TAIL_CHARS = 300
+
+# Career topics and intents that call for a full, structured answer even
+# when phrased briefly. Explicit word forms keep e.g. "planet" from matching.
+COMPLEX_PATTERN = re.compile(
+    r"\b(plans?|planning|roadmaps?|strateg(y|ies)|transition(s|ing)?|"
+    r"switch(es|ing)?|resumes?|cvs?|cover letters?|portfolios?|paths?|"
+    r"step[- ]by[- ]step|compar(e|ing|ison)|timelines?|interview prep|"
+    r"prepare for|salar(y|ies)|negotiat(e|ing|ion)|linkedin|"
+    r"become|becoming|careers?|skills?|learn(ing)?|jobs?|roles?|"
+    r"get(ting)? into)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class RouteDecision:
+    """Outcome of routing one user message."""
+    tier: ModelTier
+    reason: str
+    word_count: int
+
+
+class QueryRouter:
+    """
+    Classifies a user message as 'light' or 'full' using local heuristics
+    and resolves it to a configured ModelTier.
+    """
+
+    def __init__(self, routing: Optional[RoutingSettings]) -> None:
+        self.routing = routing
+
+    def classify(
+        self,
+        message: str,
+        last_reply: Optional[str] = None,
+    ) -> Tuple[str, str, int]:
+        """
+        Return (tier_name, reason, word_count) for a message.
+
+        Only pure acknowledgements go to the light tier, and not when the
+        previous assistant turn ended with an offer or a question.
+
+        Args:
+            message: Sanitized user input.
+            last_reply: The previous assistant turn, if any.
+
+        Returns:
+            Tuple of (tier name, short human-readable reason, word count).
+        """
+        text = message.strip()
+        word_count = len(text.split())
+
+        if COMPLEX_PATTERN.search(text):
+            return "full", "complex_keyword", word_count
+        if not ACK_PATTERN.match(text):
+            return "full", "default", word_count
+        if last_reply and OFFER_PATTERN.search(last_reply[-OFFER_TAIL_CHARS:]):
+            return "full", "reply_to_offer", word_count
+        return "light", "acknowledgement", word_count
+
+    def route(
+        self,
+        message: str,
+        last_reply: Optional[str] = None,
+    ) -> Optional[RouteDecision]:
+        """
+        Pick the tier for a message.
+
+        Returns None when routing is disabled or not configured, in which
+        case the caller should use the base model settings.
+        """
+        if not self.routing or not self.routing.enabled or not self.routing.tiers:
+            return None
+
+        tier_name, reason, word_count = self.classify(message, last_reply)
+        tier = self.routing.tiers.get(tier_name)
+        if tier is None:
+            tier = self.routing.tiers.get(self.routing.default_tier)
+            reason = f"{reason}->fallback"
+        if tier is None:
+            logger.warning(
+                "Routing tier '%s' and default tier '%s' are not configured.",
+                tier_name,
+                self.routing.default_tier,
+            )
+            return None
+
+        decision = RouteDecision(
+            tier=tier,
+            reason=reason,
+            word_count=word_count,
+        )
+        logger.info(
+            "Routing decision: tier=%s model=%s max_output_tokens=%s top_k=%s "
+            "reason=%s words=%s",
+            tier.name,
+            tier.model_name,
+            tier.max_output_tokens,
+            tier.top_k,
+            reason,
+            decision.word_count,
+        )
+        return decision
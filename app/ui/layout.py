@@ -130,7 +130,11 @@ def setup_page(app_name: str, domain_name: str) -> None:
     )
 
 
-def render_sidebar(settings) -> dict:
+def render_sidebar(
+    settings,
+    session_tokens: int = 0,
+    daily_tokens: int = 0,
+) -> dict:
     """
     Render the sidebar with runtime controls.
     Returns dict of overrides: {temperature, max_output_tokens}.
@@ -156,11 +160,25 @@ def render_sidebar(settings) -> dict:
         st.divider()
         st.markdown("## 💬 Session")
         if st.button("🔄 Start fresh", use_container_width=True):
+            st.session_state["chat_service"].cancel_inflight("start_fresh")
             st.session_state["memory"].clear()
-            st.session_state["chat_tokens"] = 0
             st.rerun()
-        total = st.session_state.get("chat_tokens", 0)
-        st.caption(f"∼ {total:,} tokens used this session.")
+        # Same counter the session budget is enforced against; it is not
+        # reset by "Start fresh".
+        session_budget = settings.usage.session_token_budget
+        if session_budget:
+            st.progress(
+                min(session_tokens / session_budget, 1.0),
+                text=f"{session_tokens:,} / {session_budget:,} tokens used this session",
+            )
+        else:
+            st.caption(f"{session_tokens:,} tokens used this session.")
+        daily_budget = settings.usage.daily_token_budget
+        if daily_budget:
+            st.progress(
+                min(daily_tokens / daily_budget, 1.0),
+                text=f"{daily_tokens:,} / {daily_budget:,} tokens used today",
+            )
         st.divider()
         st.markdown("## ℹ️ About")
         st.caption(
@@ -213,6 +231,19 @@ def render_typing_indicator() -> None:
     )
 
 
+def render_streaming_reply(slot, text: str) -> None:
+    """Render the partial assistant reply into a placeholder while streaming."""
+    safe_content = text.replace("<", "&lt;").replace(">", "&gt;")
+    slot.markdown(
+        '<div class="chat-wrap"><div class="msg-row">'
+        '<div class="avatar ai-av">AI</div>'
+        '<div><div class="msg-label">🧠 Career Advisor</div>'
+        f'<div class="bubble ai-bubble">{safe_content}</div>'
+        '</div></div></div>',
+        unsafe_allow_html=True,
+    )
+
+
 def chat_input() -> str:
     """Render the bottom-fixed chat input box."""
     return st.chat_input(